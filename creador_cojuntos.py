@@ -1,8 +1,22 @@
+import numpy as np
 import pandas as pd
-from typing import List, Union, Optional
-from collections import Counter
+from typing import Dict, List, Union, Optional, Tuple
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import os
 import re
 
+try:
+    import pyarrow  # noqa: F401  Habilita str.contains con los kernels de Arrow
+    _HAY_PYARROW = True
+except ImportError:
+    _HAY_PYARROW = False
+
+# Copy-on-Write: los DataFrames devueltos comparten memoria y solo se copian
+# al modificarse. En pandas >= 3.0 siempre está activo.
+if int(pd.__version__.split('.')[0]) == 2:
+    pd.set_option('mode.copy_on_write', True)
+
 class DataFilterManager:
     """
     Gestor de flujo de trabajo para filtrado de DataFrames con jerarquía de subsets.
@@ -14,28 +28,75 @@ class DataFilterManager:
     Attributes
     ----------
     df_original : pd.DataFrame
-        Copia original del DataFrame base (para restaurar todo).
+        DataFrame base tal como se recibió (para restaurar todo).
     df_principal : pd.DataFrame
         DataFrame base que se modifica al aplicar filtros.
     columna_id : str
         Nombre de la columna identificadora usada para match exacto.
+        Si sus valores son únicos se usa como índice (ordenado) de los
+        DataFrames; si no, y es de texto, se convierte a categórica para
+        comparar por códigos.
     subsets : dict
         Diccionario que almacena los subsets creados.
-    _historial_principal : list
-        Pila que guarda copias del df_principal antes de cada eliminación.
+    verbose : bool
+        Si True (por defecto) los métodos imprimen mensajes de estado.
+        Con False el gestor trabaja en silencio (uso en scripts o pipelines).
+    _meta : dict
+        Metadatos de cada subset por nombre ('parent', 'nrows',
+        'palabras_excluidas', 'aplicado').
+    _historial_principal : deque
+        Pila acotada con los valores de `columna_id` eliminados del df_principal
+        en cada llamada a `aplicar_filtro` (como máximo MAX_UNDO pasos).
     """
     
-    def __init__(self, df: pd.DataFrame, columna_id: str):
-        self.df_original = df.copy()
-        self.df_principal = df.copy()
+    MAX_UNDO = 50  # Niveles de deshacer guardados en el historial
+    NOMBRES_RESERVADOS = frozenset({'principal'})
+    
+    def __init__(self, df: pd.DataFrame, columna_id: str, verbose: bool = True):
+        # Con IDs únicos, eliminar filas es un drop por índice (sin recorrer la columna)
+        self._indexado = df[columna_id].is_unique
+        tipo_id = df[columna_id].dtype
+        if not self._indexado and (
+            pd.api.types.is_object_dtype(tipo_id) or pd.api.types.is_string_dtype(tipo_id)
+        ):
+            # Los subsets heredan las categorías: las eliminaciones comparan códigos enteros
+            df = df.assign(**{columna_id: df[columna_id].astype('category')})
+        if _HAY_PYARROW:
+            # Columnas de texto en formato Arrow: los filtros usan kernels en C++
+            columnas_texto = {
+                c: df[c].astype('string[pyarrow]')
+                for c in df.columns
+                if df[c].dtype == object
+                and pd.api.types.infer_dtype(df[c], skipna=True) == 'string'
+            }
+            if columnas_texto:
+                df = df.assign(**columnas_texto)
+        if self._indexado:
+            df = df.set_index(columna_id, drop=False).rename_axis(None)
+            try:
+                # Índice ordenado: restaurar_anterior solo tiene que intercalar filas
+                df = df.sort_index()
+            except TypeError:
+                # IDs de tipos mezclados (p. ej. 1 y 'a'): se conserva el orden recibido
+                pass
+        self.df_original = df
+        self.df_principal = df
         self.columna_id = columna_id
+        self.verbose = verbose
         self.subsets = {'principal': self.df_principal}
-        self._historial_principal = []  # Para restaurar_anterior()
+        self._subset_names = []  # Subsets creados por el usuario, en orden de creación
+        self._ultimo = None  # Nombre del último subset creado
+        self._meta = {}  # Metadatos por subset: parent, nrows, palabras_excluidas, aplicado
+        # Para restaurar_anterior(); descarta los pasos más antiguos al superar MAX_UNDO
+        self._historial_principal = deque(maxlen=self.MAX_UNDO)
+        self._regex_cache = {}  # palabras -> alternancia regex (texto) para str.contains
+        self._word_counts = {}  # Conteo de palabras por subset (para ver_top_palabras)
     
     def restaurar_anterior(self) -> None:
         """
         Deshace la ULTIMA operación de eliminación (aplicar_filtro).
-        Restaura el df_principal a su estado inmediatamente anterior.
+        Restaura el df_principal a su estado inmediatamente anterior,
+        reinsertando desde df_original las filas eliminadas en ese paso.
         
         Returns
         -------
@@ -43,15 +104,32 @@ class DataFilterManager:
             Modifica self.df_principal in-place.
         """
         if not self._historial_principal:
-            print("⚠️ No hay operaciones para deshacer.")
+            if self.verbose:
+                print("⚠️ No hay operaciones para deshacer.")
             return
         
-        # Recuperar el último estado guardado
-        self.df_principal = self._historial_principal.pop()
+        # Reinsertar las filas eliminadas en el último paso. Esas filas no están en
+        # df_principal, así que basta con concatenar (sin drop_duplicates, que además
+        # descartaría filas legítimas cuando el ID se repite).
+        ids_eliminados = self._historial_principal.pop()
+        if self._indexado:
+            restauradas = self.df_original.loc[ids_eliminados]
+        else:
+            restauradas = self.df_original[self.df_original[self.columna_id].isin(ids_eliminados)]
+        self.df_principal = pd.concat([self.df_principal, restauradas])
+        if self.df_original.index.is_monotonic_increasing:
+            # Intercalar las dos secuencias ordenadas para recuperar el orden original
+            # (si los IDs no se pudieron ordenar, las filas quedan al final)
+            self.df_principal = self.df_principal.sort_index(kind='mergesort')
         self.subsets['principal'] = self.df_principal
-        
-        print(f"✅ Restaurado al estado anterior. "
-              f"df_principal ahora tiene {len(self.df_principal)} filas.")
+        if 'principal' in self._word_counts:
+            self._word_counts['principal'] = self._word_counts['principal'].add(
+                self._contar_palabras(restauradas), fill_value=0
+            ).astype('int64')
+        
+        if self.verbose:
+            print(f"✅ Restaurado al estado anterior. "
+                  f"df_principal ahora tiene {len(self.df_principal)} filas.")
     
     def restaurar_todo(self) -> None:
         """
@@ -63,13 +141,18 @@ class DataFilterManager:
         None
             Modifica self.df_principal in-place y limpia todo.
         """
-        self.df_principal = self.df_original.copy()
+        self.df_principal = self.df_original
         self.subsets = {'principal': self.df_principal}
+        self._subset_names.clear()
+        self._ultimo = None
+        self._meta.clear()
+        self._word_counts.clear()
         self._historial_principal.clear()
         
-        print("✅ DataFrame principal restaurado al estado ORIGINAL.")
-        print("✅ Historial de cambios limpiado.")
-        print("✅ Todos los subsets eliminados.")
+        if self.verbose:
+            print("✅ DataFrame principal restaurado al estado ORIGINAL.")
+            print("✅ Historial de cambios limpiado.")
+            print("✅ Todos los subsets eliminados.")
     
     def filtrar_por_palabra(
         self, 
@@ -90,27 +173,19 @@ class DataFilterManager:
         parent : str, optional
             Nombre del subset padre. Usado internamente por `filtrar_subset()`.
         """
-        if nombre in self.subsets:
-            raise ValueError(f"El subset '{nombre}' ya existe. Usa otro nombre o elimínalo primero.")
+        self._validar_nombre_nuevo(nombre)
         
-        df_origen = self.df_principal if usar_principal else self.subsets.get('ultimo', self.df_principal)
+        if usar_principal or self._ultimo is None:
+            df_origen = self.df_principal
+        else:
+            df_origen = self.subsets[self._ultimo]
         
-        subset = filtro_palabras(
-            df=df_origen,
-            columna_descripcion=columna,
-            palabras=palabras,
-            condicional=condicional,
-            case_sensitive=case_sensitive,
-            match_exacto=match_exacto
+        mascara = self._mascara_palabras(
+            df_origen[columna], palabras, condicional, case_sensitive, match_exacto
         )
+        subset = df_origen.loc[mascara]
         
-        self.subsets[nombre] = subset
-        subset._parent = parent  # Track parent
-        self.subsets['ultimo'] = subset
-        
-        print(f"✅ Subset '{nombre}' creado con {len(subset)} filas")
-        if parent:
-            print(f"   └─ Hijo de '{parent}'")
+        self._registrar_subset(nombre, subset, parent)
         return subset
     
     def ver_top_palabras(
@@ -130,18 +205,20 @@ class DataFilterManager:
         if nombre_subset not in self.subsets:
             raise KeyError(f"Subset '{nombre_subset}' no encontrado. Usa listar_subsets() para ver disponibles.")
         
-        df_analizar = self.subsets[nombre_subset]
+        conteo = self._word_counts.get(nombre_subset)
+        if conteo is None:
+            conteo = self._contar_palabras(self.subsets[nombre_subset])
+            self._word_counts[nombre_subset] = conteo
         nombre_mostrar = nombre_subset
         
-        df_top = top_palabras(
-            df=df_analizar,
-            columna_descripcion='descripcion',
-            top_n=top_n,
-            excluir_palabras=excluir_palabras
-        )
+        if excluir_palabras:
+            conteo = conteo.drop(excluir_palabras, errors='ignore')
+        top = conteo.nlargest(top_n)
+        df_top = pd.DataFrame({'palabra': top.index, 'frecuencia': top.to_numpy()})
         
-        print(f"\n--- Top {top_n} palabras en '{nombre_mostrar}' ---")
-        print(df_top.to_string(index=False))
+        if self.verbose:
+            print(f"\n--- Top {top_n} palabras en '{nombre_mostrar}' ---")
+            print(df_top.to_string(index=False))
         return df_top
     
     def agregar_excluidos(
@@ -155,11 +232,10 @@ class DataFilterManager:
         if nombre_subset not in self.subsets:
             raise KeyError(f"Subset '{nombre_subset}' no encontrado.")
         
-        if not hasattr(self.subsets[nombre_subset], '_palabras_excluidas'):
-            self.subsets[nombre_subset]._palabras_excluidas = []
-        
-        self.subsets[nombre_subset]._palabras_excluidas.extend(palabras)
-        print(f"✅ Palabras excluidas agregadas a '{nombre_subset}': {palabras}")
+        meta = self._meta.setdefault(nombre_subset, {})
+        meta.setdefault('palabras_excluidas', []).extend(palabras)
+        if self.verbose:
+            print(f"✅ Palabras excluidas agregadas a '{nombre_subset}': {palabras}")
     
     def filtrar_subset(
         self, 
@@ -208,6 +284,95 @@ class DataFilterManager:
         
         return resultado
     
+    def filtrar_cadena(
+        self,
+        pasos: List[dict],
+        nombre_origen: str = 'principal'
+    ) -> pd.DataFrame:
+        """
+        Crea una cadena de subsets (padre -> hijo -> nieto...) en una sola pasada.
+        
+        Equivale a encadenar `filtrar_subset()`, pero acumula las máscaras sobre
+        `nombre_origen` en lugar de materializar cada subset intermedio antes de
+        filtrarlo: cada paso solo evalúa las filas que superaron los anteriores.
+        
+        Parameters
+        ----------
+        pasos : list of dict
+            Un dict por paso con las claves 'columna', 'palabras' y 'nombre', y
+            opcionalmente 'condicional', 'case_sensitive' y 'match_exacto'
+            (ver filtrar_por_palabra).
+        nombre_origen : str, optional
+            Subset sobre el que se aplica el primer paso. Por defecto 'principal'.
+            
+        Returns
+        -------
+        pd.DataFrame
+            El subset del último paso.
+        """
+        if nombre_origen not in self.subsets:
+            raise KeyError(f"Subset fuente '{nombre_origen}' no encontrado.")
+        nombres = self._validar_pasos(pasos)
+        
+        # Calcular todos los subsets antes de registrar ninguno (todo o nada)
+        df_origen = self.subsets[nombre_origen]
+        mascara = np.ones(len(df_origen), dtype=bool)
+        resultados = []
+        for paso in pasos:
+            candidatas = np.flatnonzero(mascara)
+            mascara[candidatas] = self._mascara_paso(
+                df_origen[paso['columna']].iloc[candidatas], paso
+            )
+            resultados.append(df_origen.loc[mascara])
+        
+        parent = nombre_origen  # Igual que filtrar_subset(), también si es 'principal'
+        for nombre, subset in zip(nombres, resultados):
+            self._registrar_subset(nombre, subset, parent)
+            parent = nombre
+        return resultados[-1]
+    
+    def filtrar_batch(self, pasos: List[dict]) -> Dict[str, pd.DataFrame]:
+        """
+        Crea varios subsets independientes del DataFrame principal a la vez.
+        
+        Si todas las columnas filtradas son de texto Arrow (que libera el GIL
+        durante str.contains), los filtros se evalúan en paralelo con un pool
+        de hilos; si no, uno tras otro.
+        
+        Parameters
+        ----------
+        pasos : list of dict
+            Un dict por subset con las claves 'columna', 'palabras' y 'nombre', y
+            opcionalmente 'condicional', 'case_sensitive' y 'match_exacto'
+            (ver filtrar_por_palabra).
+            
+        Returns
+        -------
+        dict
+            Los subsets creados, por nombre.
+        """
+        nombres = self._validar_pasos(pasos)
+        df_origen = self.df_principal
+        
+        def calcular_mascara(paso: dict) -> np.ndarray:
+            return self._mascara_paso(df_origen[paso['columna']], paso)
+        
+        en_paralelo = len(pasos) > 1 and all(
+            self._es_texto_arrow(df_origen[paso['columna']]) for paso in pasos
+        )
+        if en_paralelo:
+            with ThreadPoolExecutor(max_workers=min(len(pasos), os.cpu_count() or 1)) as pool:
+                mascaras = list(pool.map(calcular_mascara, pasos))
+        else:
+            mascaras = [calcular_mascara(paso) for paso in pasos]
+        
+        # Registrar en el hilo principal, una vez calculados todos
+        resultados = {}
+        for nombre, mascara in zip(nombres, mascaras):
+            resultados[nombre] = df_origen.loc[mascara]
+            self._registrar_subset(nombre, resultados[nombre], None)
+        return resultados
+    
     def aplicar_filtro(self, nombre_subset: str, propagar_a_padre: bool = True) -> None:
         """
         ELIMINA las filas del subset especificado del DataFrame principal
@@ -229,46 +394,224 @@ class DataFilterManager:
             raise KeyError(f"Subset '{nombre_subset}' no encontrado.")
         
         subset = self.subsets[nombre_subset]
-        
-        if subset.empty:
-            print(f"⚠️ Subset '{nombre_subset}' está vacío. No se eliminó nada.")
+        if nombre_subset in self.NOMBRES_RESERVADOS:
+            filas_subset = len(subset)
+        else:
+            filas_subset = self._meta[nombre_subset]['nrows']
+        
+        if filas_subset == 0:
+            if self.verbose:
+                print(f"⚠️ Subset '{nombre_subset}' está vacío. No se eliminó nada.")
             return
         
-        # --- GUARDAR ESTADO ANTERIOR EN EL HISTORIAL ---
-        self._historial_principal.append(self.df_principal.copy())
+        # IDs a eliminar: se calculan una sola vez para principal y padre
+        if self._indexado:
+            ids_a_eliminar = subset.index
+        else:
+            ids_a_eliminar = pd.Index(subset[self.columna_id].unique())
         
-        # 1. Eliminar del principal
-        self.df_principal = drop_lines_key(
-            df_target=self.df_principal,
-            df_reference=subset,
-            column_key=self.columna_id
-        )
+        # 1. Eliminar del principal (guardando en el historial los IDs eliminados)
+        self.df_principal, eliminadas = self._excluir_ids(self.df_principal, ids_a_eliminar)
+        self._historial_principal.append(pd.Index(eliminadas[self.columna_id].unique()))
+        
+        self._descontar_palabras('principal', eliminadas)
         self.subsets['principal'] = self.df_principal
         
-        print(f"✅ Eliminadas {len(subset)} filas del df_principal. "
-              f"Quedan {len(self.df_principal)} filas.")
+        if self.verbose:
+            print(f"✅ Eliminadas {len(eliminadas)} filas del df_principal. "
+                  f"Quedan {len(self.df_principal)} filas.")
         
         # 2. Si tiene padre y propagar_a_padre=True, eliminar también del padre
-        if propagar_a_padre and hasattr(subset, '_parent') and subset._parent:
-            parent_name = subset._parent
+        parent_name = self._meta.get(nombre_subset, {}).get('parent')
+        if propagar_a_padre and parent_name:
             if parent_name in self.subsets:
-                parent_df_original = self.subsets[parent_name].copy()
-                
-                self.subsets[parent_name] = drop_lines_key(
-                    df_target=self.subsets[parent_name],
-                    df_reference=subset,
-                    column_key=self.columna_id
+                self.subsets[parent_name], eliminadas = self._excluir_ids(
+                    self.subsets[parent_name], ids_a_eliminar
                 )
+                self._descontar_palabras(parent_name, eliminadas)
                 
-                filas_eliminadas = len(parent_df_original) - len(self.subsets[parent_name])
-                if filas_eliminadas > 0:
-                    print(f"✅ Eliminadas {filas_eliminadas} filas del subset padre '{parent_name}'. "
-                          f"Quedan {len(self.subsets[parent_name])} filas.")
-                else:
-                    print(f"ℹ️ No se eliminaron filas del subset padre '{parent_name}'.")
+                filas_padre = len(self.subsets[parent_name])
+                if parent_name in self._subset_names:
+                    self._meta[parent_name]['nrows'] = filas_padre
+                
+                if self.verbose:
+                    filas_eliminadas = len(eliminadas)
+                    if filas_eliminadas > 0:
+                        print(f"✅ Eliminadas {filas_eliminadas} filas del subset padre '{parent_name}'. "
+                              f"Quedan {filas_padre} filas.")
+                    else:
+                        print(f"ℹ️ No se eliminaron filas del subset padre '{parent_name}'.")
         
         # Marcar el subset como "aplicado"
-        self.subsets[nombre_subset]._aplicado = True
+        self._meta.setdefault(nombre_subset, {})['aplicado'] = True
+    
+    def _validar_nombre_nuevo(self, nombre: str) -> None:
+        """
+        Lanza ValueError si `nombre` es reservado o ya existe como subset.
+        """
+        if nombre in self.NOMBRES_RESERVADOS:
+            raise ValueError(f"'{nombre}' es un nombre reservado. Usa otro nombre.")
+        if nombre in self.subsets:
+            raise ValueError(f"El subset '{nombre}' ya existe. Usa otro nombre o elimínalo primero.")
+    
+    def _validar_pasos(self, pasos: List[dict]) -> List[str]:
+        """
+        Valida los pasos de `filtrar_cadena()`/`filtrar_batch()` y devuelve sus nombres.
+        """
+        if not pasos:
+            raise ValueError("Se necesita al menos un paso de filtrado.")
+        nombres = [paso['nombre'] for paso in pasos]
+        if len(set(nombres)) != len(nombres):
+            raise ValueError(f"Los nombres de los pasos deben ser únicos: {nombres}")
+        for nombre in nombres:
+            self._validar_nombre_nuevo(nombre)
+        return nombres
+    
+    def _mascara_paso(self, serie: pd.Series, paso: dict) -> np.ndarray:
+        """
+        Máscara de `serie` para un paso de filtrado (dict con los parámetros
+        de filtrar_por_palabra y sus mismos valores por defecto).
+        """
+        return self._mascara_palabras(
+            serie,
+            paso['palabras'],
+            paso.get('condicional', 'OR'),
+            paso.get('case_sensitive', False),
+            paso.get('match_exacto', False)
+        )
+    
+    def _registrar_subset(self, nombre: str, subset: pd.DataFrame, parent: Optional[str]) -> None:
+        """
+        Guarda un subset nuevo junto con su relación padre-hijo.
+        """
+        self.subsets[nombre] = subset
+        self._subset_names.append(nombre)
+        self._meta[nombre] = {'parent': parent, 'nrows': len(subset)}  # Track parent
+        self._ultimo = nombre
+        
+        if self.verbose:
+            print(f"✅ Subset '{nombre}' creado con {self._meta[nombre]['nrows']} filas")
+            if parent:
+                print(f"   └─ Hijo de '{parent}'")
+    
+    @staticmethod
+    def _contar_palabras(df: pd.DataFrame) -> pd.Series:
+        """
+        Frecuencia de las palabras (en minúsculas) de la columna 'descripcion',
+        indexada por palabra. Tokenización y conteo se hacen en C (findall,
+        explode, value_counts).
+        """
+        return df['descripcion'].str.lower().str.findall(r'\w+').explode().value_counts()
+    
+    def _descontar_palabras(self, nombre: str, filas_eliminadas: pd.DataFrame) -> None:
+        """
+        Resta del conteo cacheado de `nombre` las palabras de las filas eliminadas.
+        """
+        if nombre in self._word_counts and not filas_eliminadas.empty:
+            conteo = self._word_counts[nombre].sub(
+                self._contar_palabras(filas_eliminadas), fill_value=0
+            )
+            self._word_counts[nombre] = conteo[conteo > 0].astype('int64')
+    
+    @staticmethod
+    def _es_texto_arrow(serie: pd.Series) -> bool:
+        """
+        True si la serie guarda texto en formato Arrow.
+        """
+        tipo = serie.dtype
+        if isinstance(tipo, pd.StringDtype):
+            return tipo.storage.startswith('pyarrow')
+        return isinstance(tipo, pd.ArrowDtype)
+    
+    def _mascara_palabras(
+        self,
+        serie: pd.Series,
+        palabras: Union[str, List[str]],
+        condicional: str,
+        case_sensitive: bool,
+        match_exacto: bool
+    ) -> np.ndarray:
+        """
+        Máscara booleana de las filas de `serie` que cumplen el filtro de palabras.
+        
+        Con `match_exacto` se compara el valor completo de la celda contra un
+        conjunto de palabras (búsqueda por hash, sin regex). Si no, 'OR'
+        recorre la columna una sola vez con la alternancia de todas las
+        palabras y 'AND' evalúa cada palabra solo sobre las filas que siguen
+        siendo candidatas.
+        """
+        condicional = condicional.upper()
+        if condicional not in ('OR', 'AND'):
+            raise ValueError(f"Condicional '{condicional}' no válido. Usa 'OR' o 'AND'.")
+        palabras = [palabras] if isinstance(palabras, str) else palabras
+        
+        if match_exacto:
+            buscadas = set(palabras) if case_sensitive else {p.lower() for p in palabras}
+            if condicional == 'AND' and len(buscadas) > 1:
+                # Una celda no puede ser igual a dos palabras distintas
+                return np.zeros(len(serie), dtype=bool)
+            valores = serie if case_sensitive else serie.str.lower()
+            return valores.isin(buscadas).to_numpy(dtype=bool)
+        
+        if condicional == 'OR':
+            patron = self._patron_regex(palabras)
+            return serie.str.contains(
+                patron, case=case_sensitive, regex=True, na=False
+            ).to_numpy(dtype=bool)
+        
+        mascara = np.ones(len(serie), dtype=bool)
+        for palabra in palabras:
+            candidatas = np.flatnonzero(mascara)
+            if len(candidatas) == 0:
+                break
+            patron = self._patron_regex(palabra)
+            mascara[candidatas] = serie.iloc[candidatas].str.contains(
+                patron, case=case_sensitive, regex=True, na=False
+            ).to_numpy(dtype=bool)
+        return mascara
+    
+    def _patron_regex(self, palabras: Union[str, List[str]]) -> str:
+        """
+        Devuelve (y cachea) la alternancia regex que busca cualquiera de `palabras`.
+        
+        Se cachea el texto y no un re.Pattern: str.contains recibe el texto con
+        `case=` para que las columnas Arrow usen su propio kernel de regex.
+        """
+        clave = (palabras,) if isinstance(palabras, str) else tuple(palabras)
+        patron = self._regex_cache.get(clave)
+        if patron is None:
+            patron = '(?:' + '|'.join(map(re.escape, clave)) + ')'
+            self._regex_cache[clave] = patron
+        return patron
+    
+    def _excluir_ids(self, df: pd.DataFrame, ids: pd.Index) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Separa `df` en (filas que quedan, filas eliminadas) según los IDs dados.
+        """
+        if self._indexado:
+            etiquetas = ids.intersection(df.index)
+            return df.drop(etiquetas), df.loc[etiquetas]
+        mascara = self._mascara_ids(df, ids)
+        # iloc con ndarray booleano: sin alineación de índices
+        return df.iloc[~mascara], df.iloc[mascara]
+    
+    def _mascara_ids(self, df: pd.DataFrame, ids: pd.Index) -> np.ndarray:
+        """
+        Máscara booleana (ndarray) de las filas de `df` cuyo `columna_id` está en `ids`.
+        """
+        columna = df[self.columna_id]
+        if isinstance(columna.dtype, pd.CategoricalDtype):
+            codigos_columna = columna.cat.codes.to_numpy()
+            codigos = columna.cat.categories.get_indexer(ids.dropna())
+            mascara = np.isin(codigos_columna, codigos[codigos >= 0])
+            if ids.hasnans:
+                # NaN no es una categoría (código -1); Series.isin sí lo empareja
+                mascara |= codigos_columna == -1
+            return mascara
+        if isinstance(columna.dtype, np.dtype) and columna.dtype.kind in 'iu':
+            # Solo enteros: np.isin no empareja NaN (Series.isin sí)
+            return np.isin(columna.to_numpy(), ids.to_numpy())
+        return columna.isin(ids).to_numpy(dtype=bool)
     
     def get_principal(self) -> pd.DataFrame:
         """
@@ -277,28 +620,29 @@ class DataFilterManager:
         Returns
         -------
         pd.DataFrame
-            Copia del DataFrame principal en su estado actual.
+            DataFrame principal en su estado actual (Copy-on-Write: modificarlo
+            no altera el estado del gestor).
         """
-        return self.df_principal.copy()
+        return self.df_principal
     
     def listar_subsets(self) -> None:
         """
         Muestra todos los subsets creados con su cantidad de filas y relaciones.
         """
         print("\n--- Subsets disponibles ---")
-        if not self.subsets:
-            print("No hay subsets creados.")
-            return
         
         # Mostrar principal primero
         print(f"  'principal' (df_principal): {len(self.df_principal)} filas")
         
+        if not self._subset_names:
+            print("No hay subsets creados.")
+            return
+        
         # Mostrar otros subsets con relación padre
-        for nombre, subset in self.subsets.items():
-            if nombre not in ['principal', 'ultimo']:
-                parent = getattr(subset, '_parent', None)
-                parent_info = f" └─ Hijo de '{parent}'" if parent else ""
-                print(f"  '{nombre}': {len(subset)} filas{parent_info}")
+        for nombre in self._subset_names:
+            meta = self._meta[nombre]
+            parent_info = f" └─ Hijo de '{meta['parent']}'" if meta['parent'] else ""
+            print(f"  '{nombre}': {meta['nrows']} filas{parent_info}")
     
     def get_subset(self, nombre: str) -> pd.DataFrame:
         """
@@ -316,4 +660,4 @@ class DataFilterManager:
         """
         if nombre not in self.subsets:
             raise KeyError(f"Subset '{nombre}' no encontrado.")
-        return self.subsets[nombre].copy()
+        return self.subsets[nombre]